@@ -1,5 +1,6 @@
 import osmnx as ox
 import networkx as nx
+import numpy as np
 import copy
 
 # Dicionário de condições (temporário. Seria melhor uma tabela na database.)
@@ -15,8 +16,83 @@ def get_average_speed_kmh(network_type: str):
         return 5   # km/h
     return 10  # padrão. Especialmente se for anomalias da natureza como o 'all'.
 
+# Distância máxima (em metros) que aceitamos "arrastar" um ponto até o componente principal.
+# Mais do que isso e a rota deixa de ser a que o usuário pediu, então é melhor dizer que não há caminho.
+MAX_RESNAP_DISTANCE_METERS = 500
+
+# Componentes fortemente conexos. Em redes 'drive', mão única cria "ilhas" de onde não se sai (ou onde não se entra),
+# e o Dijkstra só descobre isso depois de explorar tudo que é alcançável. Calculamos uma vez por grafo carregado.
+def compute_connectivity_index(G):
+    """
+    Calcula o índice de conectividade (componentes fortemente conexos) de um grafo.
+
+    Os componentes são ordenados do maior para o menor, então o rótulo 0 é sempre o componente principal.
+    O índice é guardado fora do grafo: o find_path faz deepcopy do grafo a cada requisição e não precisa copiar isso junto.
+
+    Args:
+        G: O grafo OSMnx carregado.
+    Returns:
+        Um dicionário com 'labels' ({nó: rótulo}), 'condensed' (o DAG de componentes), 'reaches_main' e 'reached_from_main' (rótulos que chegam
+        no componente principal / que são alcançados a partir dele) e 'main_nodes', 'main_lats', 'main_lons'
+        (nós e coordenadas do componente principal, para o re-snap), ou None se o grafo estiver vazio.
+    """
+    components = sorted(nx.strongly_connected_components(G), key=len, reverse=True)
+    if not components:
+        return None
+
+    # O condensation mantém a ordem da lista de componentes, então o rótulo de cada nó é o índice do seu componente.
+    condensed = nx.condensation(G, scc=components)
+    main_nodes = list(components[0])
+
+    return {
+        'labels': condensed.graph['mapping'],
+        'condensed': condensed,
+        'reaches_main': nx.ancestors(condensed, 0) | {0},
+        'reached_from_main': nx.descendants(condensed, 0) | {0},
+        'main_nodes': main_nodes,
+        'main_lats': np.array([G.nodes[node]['y'] for node in main_nodes]),
+        'main_lons': np.array([G.nodes[node]['x'] for node in main_nodes]),
+    }
+
+def _snap_to_main_component(connectivity, lat, lon):
+    """Retorna o nó do componente principal mais próximo da coordenada e a distância até ele, em metros."""
+    distances = ox.distance.great_circle(lat, lon, connectivity['main_lats'], connectivity['main_lons'])
+    i = int(np.argmin(distances))
+    return connectivity['main_nodes'][i], distances[i]
+
+def resolve_endpoints(connectivity, start_node, end_node, start_lat, start_lon, end_lat, end_lon):
+    """
+    Usa o índice de conectividade para garantir que existe caminho entre os nós, sem rodar o Dijkstra.
+
+    Nós no mesmo componente, ou cujos componentes se ligam no DAG de componentes (bem menor que o grafo de ruas),
+    seguem como estão. Só quando não há caminho de verdade é que um início que não chega no componente principal
+    (ou um fim que não é alcançado por ele) é re-snapado para o nó mais próximo do componente principal.
+
+    Returns:
+        A tupla (start_node, end_node) que deve ser usada no pathfinding.
+    Raises:
+        nx.NetworkXNoPath: se o re-snap precisar mover um ponto mais do que MAX_RESNAP_DISTANCE_METERS.
+    """
+    labels = connectivity['labels']
+    start_label, end_label = labels[start_node], labels[end_node]
+    # Rótulos diferentes não significam caminho impossível: cadeias de mão única (main -> x -> y) viram um componente por nó.
+    if start_label == end_label or nx.has_path(connectivity['condensed'], start_label, end_label):
+        return start_node, end_node
+
+    if start_label not in connectivity['reaches_main']:
+        start_node, distance = _snap_to_main_component(connectivity, start_lat, start_lon)
+        if distance > MAX_RESNAP_DISTANCE_METERS:
+            raise nx.NetworkXNoPath("Nenhum caminho encontrado.")
+
+    if end_label not in connectivity['reached_from_main']:
+        end_node, distance = _snap_to_main_component(connectivity, end_lat, end_lon)
+        if distance > MAX_RESNAP_DISTANCE_METERS:
+            raise nx.NetworkXNoPath("Nenhum caminho encontrado.")
+
+    return start_node, end_node
+
 # Modificar o shortest_path para receber length ou time (c/ condições variáveis de peso)
-def find_path(G, start_lat, start_lon, end_lat, end_lon, network_type, optimize_for='length', average_speed_kmh=None):
+def find_path(G, start_lat, start_lon, end_lat, end_lon, network_type, optimize_for='length', average_speed_kmh=None, connectivity=None):
     """
     Encontra um caminho otimizado entre dois pontos.
 
@@ -29,11 +105,20 @@ def find_path(G, start_lat, start_lon, end_lat, end_lon, network_type, optimize_
         network_type: Tipo de rede (ex: 'drive', 'bike', 'walk', 'all').
         average_speed_kmh: Velocidade média em km/h (opcional, sobrescreve network_type se fornecida).
         optimize_for: O critério de otimização. Pode ser 'length' (mais curto) ou 'time' (mais rápido, usando condições de variação de peso).
+        connectivity: Índice de conectividade do grafo, gerado por compute_connectivity_index (opcional).
     Returns:
         Um dicionário contendo as coordenadas do caminho, o comprimento total e o tempo estimado,
         ou levanta uma exceção se o caminho não for encontrado ou ocorrer um erro.
     """
 
+    # 0. Quando o usuário entrega uma série de coordenadas, OSMnx precisa determinar de qual NÓ essa coordenada se refere.
+    # Pare para pensar: mesmo que um nó guarde sua coordenada, ela nunca é EXATA.
+    start_node, end_node = ox.nearest_nodes(G, X=[start_lon, end_lon], Y=[start_lat, end_lat])
+
+    # Com o índice de conectividade, pares impossíveis são resolvidos (ou rejeitados) antes da cópia do grafo e do Dijkstra.
+    if connectivity is not None:
+        start_node, end_node = resolve_endpoints(connectivity, start_node, end_node, start_lat, start_lon, end_lat, end_lon)
+
     # 1. Fazer cópia do grafo original para aplicar condições de variação de peso
     graph_copy = copy.deepcopy(G)
 
@@ -68,12 +153,7 @@ def find_path(G, start_lat, start_lon, end_lat, end_lon, network_type, optimize_
     weight_attribute = 'travel_time' if optimize_for == 'time' else 'length'
 
     try:
-        # 1. Quando o usuário entrega uma série de coordenadas, OSMnx precisa determinar de qual NÓ essa coordenada se refere.
-        # Pare para pensar: mesmo que um nó guarde sua coordenada, ela nunca é EXATA.
-        start_node = ox.nearest_nodes(graph_copy, X=start_lon, Y=start_lat)
-        end_node = ox.nearest_nodes(graph_copy, X=end_lon, Y=end_lat)
-
-        # 2. O tópico principal: dijkstra_path é o algoritmo de Dijkstra.
+        # O tópico principal: dijkstra_path é o algoritmo de Dijkstra.
         # Aqui, ele retorna um grafo. Um grafo que é, completamente inelegível pelo frontend, pois ele espera coordenadas.
         # Felizmente, há coordenadas aqui, mas precisam ser extraídas.
         shortest_path_nodes = nx.dijkstra_path(graph_copy, source=start_node, target=end_node, weight=weight_attribute)
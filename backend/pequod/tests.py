@@ -0,0 +1,94 @@
+from unittest import mock
+
+import networkx as nx
+from django.test import SimpleTestCase
+from rest_framework.test import APIRequestFactory
+
+from . import views
+from .services.pathfinding_service import compute_connectivity_index, find_path
+
+
+def build_toy_graph():
+    """
+    Grafo de brinquedo (~111 m a cada 0.001 grau):
+        - Componente principal: 1 <-> 2 <-> 3, ao longo do equador.
+        - Ilha próxima: 10 <-> 11, logo acima, só se entra nela por 3 -> 10 (mão única).
+        - Ilha distante: 20 <-> 21, a uns 2 km, também só com entrada (3 -> 20).
+    """
+    G = nx.MultiDiGraph(crs='epsg:4326')
+    coords = {
+        1: (0.000, 0.000), 2: (0.001, 0.000), 3: (0.002, 0.000),
+        10: (0.001, 0.002), 11: (0.002, 0.002),
+        20: (0.001, 0.020), 21: (0.002, 0.020),
+    }
+    for node, (x, y) in coords.items():
+        G.add_node(node, x=x, y=y)
+
+    for u, v in [(1, 2), (2, 3), (10, 11), (20, 21)]:
+        G.add_edge(u, v, length=111.0)
+        G.add_edge(v, u, length=111.0)
+    G.add_edge(3, 10, length=250.0)
+    G.add_edge(3, 20, length=2000.0)
+    return G
+
+
+class ConnectivityTests(SimpleTestCase):
+    def setUp(self):
+        self.G = build_toy_graph()
+        self.connectivity = compute_connectivity_index(self.G)
+
+    def test_labels_put_main_component_first(self):
+        labels = self.connectivity['labels']
+        self.assertEqual({labels[1], labels[2], labels[3]}, {0})
+        self.assertEqual(labels[10], labels[11])
+        self.assertNotEqual(labels[10], 0)
+        self.assertNotIn('scc_labels', self.G.graph)
+
+    def test_different_components_resnap_to_main(self):
+        # Sair da ilha próxima é impossível: o início é arrastado para o nó 2, o mais próximo no componente principal.
+        path = find_path(self.G, 0.002, 0.001, 0.0, 0.0, 'walk', connectivity=self.connectivity)
+        self.assertEqual(path['path_segments'][0]['start_node'], 2)
+        self.assertEqual(path['path_segments'][-1]['end_node'], 1)
+
+    def test_different_components_too_far_are_rejected(self):
+        with mock.patch('networkx.dijkstra_path') as dijkstra:
+            with self.assertRaises(nx.NetworkXNoPath):
+                find_path(self.G, 0.020, 0.001, 0.0, 0.0, 'walk', connectivity=self.connectivity)
+        dijkstra.assert_not_called()
+
+    def test_same_secondary_component_still_routes(self):
+        path = find_path(self.G, 0.002, 0.001, 0.002, 0.002, 'walk', connectivity=self.connectivity)
+        self.assertEqual(path['path_segments'][0]['start_node'], 10)
+        self.assertEqual(path['path_segments'][-1]['end_node'], 11)
+
+    def test_reachable_pair_in_different_components_keeps_route(self):
+        # Cadeia de mão única saindo do componente principal: 2 -> 30 -> 31, bem longe (~2 km).
+        # 30 e 31 viram componentes de um nó só, mas 30 -> 31 continua sendo um caminho válido.
+        self.G.add_node(30, x=0.001, y=-0.020)
+        self.G.add_node(31, x=0.002, y=-0.020)
+        self.G.add_edge(2, 30, length=2000.0)
+        self.G.add_edge(30, 31, length=111.0)
+        connectivity = compute_connectivity_index(self.G)
+        self.assertNotEqual(connectivity['labels'][30], connectivity['labels'][31])
+
+        expected = find_path(self.G, -0.020, 0.001, -0.020, 0.002, 'walk')
+        path = find_path(self.G, -0.020, 0.001, -0.020, 0.002, 'walk', connectivity=connectivity)
+        self.assertEqual(path, expected)
+        self.assertEqual(path['path_segments'][0]['start_node'], 30)
+
+
+class RegisterGraphTests(SimpleTestCase):
+    def test_connectivity_is_computed_once_at_load(self):
+        factory = APIRequestFactory()
+        view = views.PathfinderView.as_view()
+        params = {'start_lat': 0.002, 'start_lon': 0.001, 'end_lat': 0.0, 'end_lon': 0.0}
+
+        with mock.patch.dict(views.LOADED_GRAPHS, clear=True), \
+             mock.patch.dict(views.CONNECTIVITY_INDEX, clear=True), \
+             mock.patch.object(views, 'compute_connectivity_index', wraps=compute_connectivity_index) as compute:
+            views.register_graph('walk', build_toy_graph())
+            for _ in range(2):
+                response = view(factory.get('/api/pequod/pathfinder/walk/', params), network_type='walk')
+                self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(compute.call_count, 1)
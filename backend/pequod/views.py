@@ -11,7 +11,7 @@ from rest_framework.response import Response
 from rest_framework import status
 
 # Importar services e serializers
-from .services.pathfinding_service import find_path
+from .services.pathfinding_service import find_path, compute_connectivity_index
 from .services.map_utils import download_graph, get_map_key_and_filepath, get_place_name_from_coords
 from .serializers import PathfindingRequestSerializer
 
@@ -20,18 +20,27 @@ logger = logging.getLogger(__name__)
 # Grafos continuam sendo carregados na memória, mas um LLM veio na minha casa e me ameaçou de morte se eu não usasse um lock.
 # Olha isso, ele tá até autocompletamente o resto da ameaça.
 LOADED_GRAPHS = {}
+CONNECTIVITY_INDEX = {} # Índice de conectividade por tipo de rede, fora do grafo (ver compute_connectivity_index).
 graphs_lock = Lock()
 
 PLACE_PREFIX = getattr(settings, 'OSMNX_PLACE_PREFIX', 'marica')
 GRAPH_NETWORK_TYPES = ['drive', 'bike', 'walk', 'all'] # Suportando apenas drive, bike e all por enquanto.
 
+def register_graph(network_type, G):
+    """Calcula o índice de conectividade uma única vez e publica o grafo junto com ele."""
+    connectivity = compute_connectivity_index(G)
+    with graphs_lock:
+        CONNECTIVITY_INDEX[network_type] = connectivity
+        LOADED_GRAPHS[network_type] = G
+    return connectivity
+
 for network_type in GRAPH_NETWORK_TYPES:
     key, filepath = get_map_key_and_filepath(PLACE_PREFIX, network_type)
     if os.path.exists(filepath):
         try:
             logger.info(f"Carregando mapa existente: {filepath}")
             G = ox.load_graphml(filepath)
-            LOADED_GRAPHS[network_type] = G
+            register_graph(network_type, G)
         except Exception as e:
             logger.error(f"Erro ao carregar o mapa {filepath} na inicialização: {e}")
 
@@ -49,7 +58,9 @@ class PathfinderView(APIView):
         validated_data = serializer.validated_data
 
         # 1. Obter o grafo do OSM usando osmnx (da memória ou via download)
-        G = LOADED_GRAPHS.get(network_type)
+        with graphs_lock:
+            G = LOADED_GRAPHS.get(network_type)
+            connectivity = CONNECTIVITY_INDEX.get(network_type)
         if G is None:
             logger.warning(f"Mapa para '{network_type}' não encontrado. Tentando baixar...")
             if network_type not in GRAPH_NETWORK_TYPES:
@@ -59,8 +70,7 @@ class PathfinderView(APIView):
                 place_prefix = settings.OSMNX_PLACE_PREFIX
                 
                 G = download_graph(place_query, place_prefix, network_type)
-                with graphs_lock:
-                    LOADED_GRAPHS[network_type] = G
+                connectivity = register_graph(network_type, G)
                 
                 logger.info(f"Mapa para '{network_type}' baixado e carregado com sucesso.")
 
@@ -77,7 +87,8 @@ class PathfinderView(APIView):
                 end_lat=validated_data['end_lat'],
                 end_lon=validated_data['end_lon'],
                 network_type=network_type,
-                average_speed_kmh=validated_data.get('average_speed_kmh')
+                average_speed_kmh=validated_data.get('average_speed_kmh'),
+                connectivity=connectivity
             )
             
             # 3. O que é entregue é um JSON contendo todos os latlongs até o destino (quem lida com isso é o DRF)